@@ -0,0 +1,102 @@
+"""
+bleekWare.Adapter
+"""
+
+import asyncio
+
+from java import jvoid, Override, static_proxy
+
+from android.bluetooth import BluetoothAdapter
+from android.content import BroadcastReceiver, Context, Intent, IntentFilter
+
+from . import logger
+
+
+class _PythonAdapterStateReceiver(static_proxy(BroadcastReceiver)):
+    """Receiver for state changes of the Bluetooth adapter. PRIVATE."""
+
+    def __init__(self, monitor):
+        super(_PythonAdapterStateReceiver, self).__init__()
+        self.monitor = monitor
+
+    @Override(jvoid, [Context, Intent])
+    def onReceive(self, context, intent):
+        """Pass the new adapter state to the monitor.
+
+        This is the callback method for BluetoothAdapter's
+        ACTION_STATE_CHANGED broadcast.
+        """
+        state = intent.getIntExtra(
+            BluetoothAdapter.EXTRA_STATE, BluetoothAdapter.ERROR
+        )
+        self.monitor._state_changed(state)
+
+
+class AdapterMonitor:
+    """Class to cache the Bluetooth adapter and follow its state.
+
+    Running scanners and connected clients register with the monitor.
+    When the adapter is turned off, their pending operations fail.
+    When it is turned on again, scans are restarted and clients with
+    'auto_reconnect' are reconnected.
+    There is only one monitor, use AdapterMonitor.get() to get it.
+    """
+
+    monitor = None
+
+    def __init__(self, activity):
+        self.activity = activity
+        self.loop = asyncio.get_running_loop()
+        self.scanners = set()
+        self.clients = set()
+        self.receiver = None
+        self.adapter = BluetoothAdapter.getDefaultAdapter()
+        if self.adapter is None:
+            self.state = BluetoothAdapter.STATE_OFF
+            return
+
+        self.state = self.adapter.getState()
+        self.receiver = _PythonAdapterStateReceiver(self)
+        self.activity.registerReceiver(
+            self.receiver,
+            IntentFilter(BluetoothAdapter.ACTION_STATE_CHANGED),
+        )
+
+    @classmethod
+    def get(cls, activity):
+        """Return the monitor, create it on first call.
+
+        Must be called from a coroutine.
+        """
+        if cls.monitor is None:
+            cls.monitor = cls(activity)
+        return cls.monitor
+
+    @property
+    def is_on(self):
+        return self.state == BluetoothAdapter.STATE_ON
+
+    def _state_changed(self, state):
+        """Store the new state and inform scanners and clients. PRIVATE."""
+        self.state = state
+        self.loop.call_soon_threadsafe(self._notify, state)
+
+    def _notify(self, state):
+        if state in (
+            BluetoothAdapter.STATE_TURNING_OFF,
+            BluetoothAdapter.STATE_OFF,
+        ):
+            logger.info('Bluetooth adapter turned off')
+            hook = '_adapter_turned_off'
+        elif state == BluetoothAdapter.STATE_ON:
+            logger.info('Bluetooth adapter turned on')
+            hook = '_adapter_turned_on'
+        else:
+            return
+        # One failing scanner or client must not keep the others from
+        # recovering
+        for listener in list(self.scanners) + list(self.clients):
+            try:
+                getattr(listener, hook)()
+            except Exception as e:
+                logger.error(f'Error handling adapter state change: "{e}"')
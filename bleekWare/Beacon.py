@@ -0,0 +1,169 @@
+"""
+bleekWare.Beacon
+
+Decoders for common beacon formats in advertisement data.
+"""
+
+import collections
+import struct
+import uuid
+
+from . import normalize_uuid
+
+
+APPLE_COMPANY_ID = 0x004C
+EDDYSTONE_UUID = '0000feaa-0000-1000-8000-00805f9b34fb'
+
+IBeacon = collections.namedtuple(
+    'IBeacon', ['uuid', 'major', 'minor', 'tx_power']
+)
+EddystoneUID = collections.namedtuple(
+    'EddystoneUID', ['namespace', 'instance', 'tx_power']
+)
+EddystoneURL = collections.namedtuple('EddystoneURL', ['url', 'tx_power'])
+EddystoneTLM = collections.namedtuple(
+    'EddystoneTLM',
+    ['battery_voltage', 'temperature', 'advertising_count', 'uptime'],
+)
+
+# Manufacturer data: type (0x02), length (0x15), UUID, major, minor, power
+_IBEACON = struct.Struct('>2s16sHHb')
+# Service data: frame type, tx power, namespace, instance
+_EDDYSTONE_UID = struct.Struct('>Bb10s6s')
+# Service data: frame type, tx power, URL scheme
+_EDDYSTONE_URL = struct.Struct('>BbB')
+# Service data: frame type, version, battery (mV), temperature (8.8 fixed
+# point), advertising count, time since boot (0.1 s)
+_EDDYSTONE_TLM = struct.Struct('>BBHhII')
+_NO_TEMPERATURE = -0x8000  # 0x8000, if temperature is not supported
+
+_URL_SCHEMES = ('http://www.', 'https://www.', 'http://', 'https://')
+_URL_CODES = (
+    '.com/',
+    '.org/',
+    '.edu/',
+    '.net/',
+    '.info/',
+    '.biz/',
+    '.gov/',
+    '.com',
+    '.org',
+    '.edu',
+    '.net',
+    '.info',
+    '.biz',
+    '.gov',
+)
+
+
+def parse_ibeacon(data):
+    """Decode an iBeacon frame from Apple's manufacturer data."""
+    if len(data) != _IBEACON.size:
+        return None
+    prefix, beacon_uuid, major, minor, tx_power = _IBEACON.unpack_from(data)
+    if prefix != b'\x02\x15':
+        return None
+    return IBeacon(str(uuid.UUID(bytes=beacon_uuid)), major, minor, tx_power)
+
+
+def _parse_eddystone_uid(data):
+    if len(data) < _EDDYSTONE_UID.size:
+        return None
+    _, tx_power, namespace, instance = _EDDYSTONE_UID.unpack_from(data)
+    return EddystoneUID(namespace.hex(), instance.hex(), tx_power)
+
+
+def _parse_eddystone_url(data):
+    if len(data) < _EDDYSTONE_URL.size:
+        return None
+    _, tx_power, scheme = _EDDYSTONE_URL.unpack_from(data)
+    if scheme >= len(_URL_SCHEMES):
+        return None
+    url = [_URL_SCHEMES[scheme]]
+    for code in bytes(data[_EDDYSTONE_URL.size :]):
+        if code < len(_URL_CODES):
+            url.append(_URL_CODES[code])
+        elif 0x20 < code < 0x7F:
+            url.append(chr(code))
+        else:  # Reserved for future use
+            return None
+    return EddystoneURL(''.join(url), tx_power)
+
+
+def _parse_eddystone_tlm(data):
+    if len(data) < _EDDYSTONE_TLM.size:
+        return None
+    _, version, battery, temperature, count, uptime = (
+        _EDDYSTONE_TLM.unpack_from(data)
+    )
+    if version != 0:  # Encrypted TLM frames are not supported
+        return None
+    return EddystoneTLM(
+        battery,
+        None if temperature == _NO_TEMPERATURE else temperature / 256,
+        count,
+        uptime / 10,
+    )
+
+
+_EDDYSTONE_FRAMES = {
+    0x00: _parse_eddystone_uid,
+    0x10: _parse_eddystone_url,
+    0x20: _parse_eddystone_tlm,
+}
+
+
+def parse_eddystone(data):
+    """Decode an Eddystone UID, URL or TLM frame from service data."""
+    if not data:
+        return None
+    parser = _EDDYSTONE_FRAMES.get(data[0])
+    return None if parser is None else parser(data)
+
+
+_manufacturer_formats = {APPLE_COMPANY_ID: [parse_ibeacon]}
+_service_formats = {EDDYSTONE_UUID: [parse_eddystone]}
+
+
+def register_manufacturer_format(company_id, parser):
+    """Register a decoder for manufacturer data of a company ID.
+
+    'parser' receives the manufacturer data (without company ID) and
+    returns the decoded object or None, if the data don't match.
+    """
+    _manufacturer_formats.setdefault(company_id, []).append(parser)
+
+
+def register_service_format(service_uuid, parser):
+    """Register a decoder for service data of a service UUID.
+
+    'parser' receives the service data and returns the decoded object
+    or None, if the data don't match.
+    """
+    service_uuid = normalize_uuid(service_uuid)
+    _service_formats.setdefault(service_uuid, []).append(parser)
+
+
+def decode(advertisement_data):
+    """Return a list of all beacon frames found in advertisement data."""
+    beacons = []
+    for company_id, data in advertisement_data.manufacturer_data.items():
+        for parser in _manufacturer_formats.get(company_id, ()):
+            beacon = parser(data)
+            if beacon is not None:
+                beacons.append(beacon)
+    for service_uuid, data in advertisement_data.service_data.items():
+        for parser in _service_formats.get(service_uuid, ()):
+            beacon = parser(data)
+            if beacon is not None:
+                beacons.append(beacon)
+    return beacons
+
+
+def decode_all(advertisements):
+    """Decode a batch of advertisement data.
+
+    Returns a list with the list of beacon frames for each
+    AdvertisementData object, in the same order.
+    """
+    return [advertisement.beacons for advertisement in advertisements]
@@ -3,8 +3,11 @@ bleekware.Client
 """
 
 import asyncio
+import collections
 import functools
 import inspect
+import queue
+import threading
 
 from java import jarray, jbyte, jclass, jint, jvoid, Override, static_proxy
 from java.util import UUID
@@ -19,12 +22,31 @@ from android.bluetooth import (
 )
 from android.os import Build
 
-from . import BLEDevice, BLEGattService
+from . import BLEDevice, BLEGattService, CallbackDispatcher
+from . import java_bytes_to_python, normalize_uuid
+from .Adapter import AdapterMonitor
+from .Tracer import null_tracer
 from . import bleekWareError, bleekWareCharacteristicNotFoundError, logger
+from . import bleekWareNotificationError
 
 # Client Characteristic Configuration Descriptor
 CCCD = '00002902-0000-1000-8000-00805f9b34fb'
 
+PROPERTY_NOTIFY = BluetoothGattCharacteristic.PROPERTY_NOTIFY
+PROPERTY_INDICATE = BluetoothGattCharacteristic.PROPERTY_INDICATE
+
+# BluetoothStatusCodes.SUCCESS, the class is not available before Android 12
+STATUS_SUCCESS = 0
+
+# Number of different payload sizes to keep Java byte arrays for
+WRITE_BUFFER_POOL_SIZE = 16
+
+# Size of the read buffer for L2CAP channels
+L2CAP_BUFFER_SIZE = 65536
+
+# Maximum delay between reconnection attempts, in seconds
+RECONNECT_MAX_DELAY = 30
+
 
 class _PythonGattCallback(static_proxy(BluetoothGattCallback)):
     """Callback class for GattClient. PRIVATE."""
@@ -39,12 +61,22 @@ class _PythonGattCallback(static_proxy(BluetoothGattCallback)):
 
         This is the callback function for Android's 'device.ConnectGatt'.
         """
+        tracer = self.client.tracer
+        tracer.instant(
+            'onConnectionStateChange',
+            address=self.client.address,
+            status=status,
+            new_state=newState,
+        )
         if newState == BluetoothProfile.STATE_CONNECTED:
             logger.info('connected')
-            gatt.discoverServices()
+            with tracer.span('discoverServices', address=self.client.address):
+                gatt.discoverServices()
         elif newState == BluetoothProfile.STATE_DISCONNECTED:
             logger.info('disconnected')
             gatt = None
+            self.client._link_lost = True
+            self.client._fail_descriptor_writes()
             if self.client.disconnected_callback:
                 self.client.disconnected_callback()
 
@@ -54,6 +86,9 @@ class _PythonGattCallback(static_proxy(BluetoothGattCallback)):
 
         This is the callback function for Android's 'gatt.discoverServices'.
         """
+        self.client.tracer.instant(
+            'onServicesDiscovered', address=self.client.address, status=status
+        )
         services = list()
         for gatt_service in gatt.getServices().toArray():
             service = BLEGattService(gatt_service)
@@ -79,6 +114,13 @@ class _PythonGattCallback(static_proxy(BluetoothGattCallback)):
         and the actual version (API level 33 upwards  / Android 13 and newer).
         """
         status = args[-1]
+        if self.client.tracer.enabled:
+            self.client.tracer.instant(
+                'onCharacteristicRead',
+                address=self.client.address,
+                characteristic=characteristic.getUuid(),
+                status=status,
+            )
         # Android 12 and below:
         if len(args) == 1:
             value = characteristic.getValue()
@@ -95,33 +137,246 @@ class _PythonGattCallback(static_proxy(BluetoothGattCallback)):
 
         This is the callback function for notifying services.
         """
-        if self.client.notification_callback:
-            data = characteristic.getValue()
-            if inspect.iscoroutinefunction(self.client.notification_callback):
-                task = self.client.loop.create_task(
-                    self.client.notification_callback(
-                        characteristic, bytearray(data)
-                    )
+        tracer = self.client.tracer
+        uuid = str(characteristic.getUuid())
+        if tracer.enabled:
+            tracer.instant(
+                'onCharacteristicChanged',
+                address=self.client.address,
+                characteristic=uuid,
+            )
+        callback = self.client._notifying.get(uuid)
+        if callback:
+            data = self.client._convert_received(characteristic.getValue())
+            if inspect.iscoroutinefunction(callback):
+                # This runs on Android's Binder thread, not the event loop
+                future = asyncio.run_coroutine_threadsafe(
+                    callback(characteristic, data), self.client.loop
                 )
                 # Make 'hard' reference to avoid GCing of the task
-                self.client._async_callbacks.add(task)
-                task.add_done_callback(self.client._async_callbacks.discard)
+                self.client._async_callbacks.add(future)
+                future.add_done_callback(self.client._async_callbacks.discard)
+            elif self.client.callback_dispatcher:
+                dispatcher = self.client.callback_dispatcher
+                if dispatcher.in_process:
+                    # The Java characteristic can't be pickled
+                    dispatcher.submit(uuid, callback, uuid, bytes(data))
+                else:
+                    dispatcher.submit(uuid, callback, characteristic, data)
             else:
-                self.client.notification_callback(
-                    characteristic, bytearray(data)
-                )
+                with tracer.span('notification_callback'):
+                    callback(characteristic, data)
         # self.client._received_data.append(characteristic.getValue())
 
+    @Override(jvoid, [BluetoothGatt, BluetoothGattDescriptor, jint])
+    def onDescriptorWrite(self, gatt, descriptor, status):
+        """Confirm the write to a descriptor.
+
+        This is the callback function for Android's 'gatt.writeDescriptor'.
+        """
+        if self.client.tracer.enabled:
+            self.client.tracer.instant(
+                'onDescriptorWrite',
+                address=self.client.address,
+                characteristic=descriptor.getCharacteristic().getUuid(),
+                status=status,
+            )
+        self.client._descriptor_written(status)
+
     @Override(jvoid, [BluetoothGatt, jint, jint])
     def onMtuChanged(self, gatt, mtu, status):
         """Handle change in MTU size.
 
         This is the callback function for changes in MTU.
         """
+        self.client.tracer.instant(
+            'onMtuChanged', address=self.client.address, mtu=mtu, status=status
+        )
         if status == BluetoothGatt.GATT_SUCCESS:
             self.client.mtu = mtu
 
 
+class _L2capTransport(asyncio.Transport):
+    """Transport for an L2CAP channel. PRIVATE.
+
+    The channel's input and output streams are blocking, so each
+    of them is pumped on its own thread. Received data is handed
+    over to the protocol on the event loop, data to send is queued
+    for the writer thread.
+
+    'socket' can be any object with the methods of Android's
+    BluetoothSocket (getInputStream(), getOutputStream(), close()).
+    """
+
+    def __init__(self, socket, protocol, loop, buffer_size, extra=None):
+        super().__init__(extra)
+        self._socket = socket
+        self._protocol = protocol
+        self._loop = loop
+        self._buffer_size = buffer_size
+        self._write_queue = queue.Queue()
+        self._write_buffer_size = 0
+        self._write_lock = threading.Lock()
+        self._writing_paused = False
+        self._reading = threading.Event()
+        self._reading.set()
+        self._closing = False
+        self._high_water = 4 * buffer_size
+        self._low_water = buffer_size
+
+        self._reader_thread = threading.Thread(
+            target=self._read_loop, daemon=True
+        )
+        self._writer_thread = threading.Thread(
+            target=self._write_loop, daemon=True
+        )
+        self._protocol.connection_made(self)
+        self._reader_thread.start()
+        self._writer_thread.start()
+
+    def _read_loop(self):
+        """Read from the input stream until the channel is closed."""
+        exception = None
+        try:
+            stream = self._socket.getInputStream()
+            buffer = jarray(jbyte)(bytes(self._buffer_size))
+            while True:
+                self._reading.wait()
+                count = stream.read(buffer)
+                if count < 0:
+                    break
+                if count:
+                    self._loop.call_soon_threadsafe(
+                        self._protocol.data_received,
+                        bytes(memoryview(buffer)[:count]),
+                    )
+        except Exception as e:
+            if not self._closing:
+                exception = e
+        # Also stop the writer thread
+        self._closing = True
+        self._reading.set()
+        self._write_queue.put(None)
+        if exception is None:
+            self._loop.call_soon_threadsafe(self._protocol.eof_received)
+        self._loop.call_soon_threadsafe(
+            self._protocol.connection_lost, exception
+        )
+
+    def _write_loop(self):
+        """Write queued data to the output stream.
+
+        Queued chunks are joined up to the buffer size to reduce the
+        number of calls to Java.
+        """
+        stream = self._socket.getOutputStream()
+        while True:
+            data = self._write_queue.get()
+            if data is None:
+                break
+            chunks = [data]
+            size = len(data)
+            while size < self._buffer_size:
+                try:
+                    data = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if data is None:
+                    self._write_queue.put(None)
+                    break
+                chunks.append(data)
+                size += len(data)
+            try:
+                stream.write(jarray(jbyte)(b''.join(chunks)))
+                stream.flush()
+            except Exception as e:
+                logger.error(f'Error writing to L2CAP channel: "{e}"')
+                break
+            with self._write_lock:
+                self._write_buffer_size -= size
+                if (
+                    self._writing_paused
+                    and self._write_buffer_size <= self._low_water
+                ):
+                    self._writing_paused = False
+                    self._loop.call_soon_threadsafe(
+                        self._protocol.resume_writing
+                    )
+        self._close_socket()
+
+    def _close_socket(self):
+        try:
+            self._socket.close()
+        except Exception as e:
+            logger.error(f'Error closing L2CAP channel: "{e}"')
+
+    def write(self, data):
+        if self._closing:
+            raise ConnectionError('L2CAP channel is closed')
+        if not data:
+            return
+        data = bytes(data)
+        with self._write_lock:
+            self._write_buffer_size += len(data)
+            pause = (
+                not self._writing_paused
+                and self._write_buffer_size > self._high_water
+            )
+            if pause:
+                self._writing_paused = True
+        self._write_queue.put(data)
+        if pause:
+            self._protocol.pause_writing()
+
+    def can_write_eof(self):
+        return False
+
+    def get_write_buffer_size(self):
+        return self._write_buffer_size
+
+    def pause_reading(self):
+        self._reading.clear()
+
+    def resume_reading(self):
+        self._reading.set()
+
+    def is_reading(self):
+        return self._reading.is_set()
+
+    def is_closing(self):
+        return self._closing
+
+    def close(self):
+        """Close the channel after all queued data is written."""
+        if self._closing:
+            return
+        self._closing = True
+        self._reading.set()
+        self._write_queue.put(None)
+
+    def abort(self):
+        """Close the channel immediately, dropping queued data."""
+        self._closing = True
+        self._reading.set()
+        self._write_queue.put(None)
+        self._close_socket()
+
+
+async def _open_l2cap_stream(socket, buffer_size=L2CAP_BUFFER_SIZE):
+    """Wrap a connected L2CAP socket into a stream pair. PRIVATE.
+
+    Returns a tuple of (asyncio.StreamReader, asyncio.StreamWriter).
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=buffer_size, loop=loop)
+    protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+    transport = _L2capTransport(
+        socket, protocol, loop, buffer_size, {'socket': socket}
+    )
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
 class Client:
     """Class to connect to a Bluetooth LE GATT server and communicate."""
 
@@ -132,10 +387,29 @@ class Client:
         address_or_ble_device,
         disconnected_callback=None,
         services=None,
+        raw_data=False,
+        callback_executor=None,
+        max_pending_callbacks=64,
+        max_callbacks_in_flight=1024,
+        tracer=None,
+        auto_reconnect=False,
         **kwargs,
     ):
-        self.__async_callbacks = set()
+        self._async_callbacks = set()
+        self.tracer = null_tracer if tracer is None else tracer
         self._received_data = list()
+        self._write_buffers = dict()
+        self._l2cap_writers = {}  # Writer: task to forget it when closed
+        self.raw_data = raw_data
+        self.callback_dispatcher = (
+            None
+            if callback_executor is None
+            else CallbackDispatcher(
+                callback_executor,
+                max_pending_callbacks,
+                max_callbacks_in_flight,
+            )
+        )
         self.__services = list()
 
         self.activity = self.context = jclass(
@@ -147,6 +421,9 @@ class Client:
             self.device = address_or_ble_device.details
         else:
             self._address = address_or_ble_device
+            self.device = None
+        if self.device is None:
+            # Also for BLEDevices from a scanner without platform objects
             self.device = BluetoothAdapter.getDefaultAdapter().getRemoteDevice(
                 self._address
             )
@@ -158,6 +435,17 @@ class Client:
         )
         if services:
             raise NotImplementedError()
+        self.auto_reconnect = auto_reconnect
+        self._reconnect = False
+        self._restore_task = None
+        self._adapter_lost = False
+        self._link_lost = False
+        self._notifying = dict()
+        self._descriptor_writes = collections.deque()
+        self._descriptor_lock = threading.Lock()
+        self._descriptor_in_flight = False
+        self._descriptor_sending = False
+        self.adapter_monitor = None
         self.adapter = None
         self.gatt = None
         self.mtu = 23
@@ -174,83 +462,212 @@ class Client:
 
     async def connect(self, **kwargs):
         """Connect to a GATT server."""
-        self.adapter = BluetoothAdapter.getDefaultAdapter()
+        with self.tracer.async_span('connect', address=self._address):
+            return await self._connect()
+
+    async def _connect(self):
+        """Connect to a GATT server. PRIVATE."""
+        self.adapter_monitor = AdapterMonitor.get(self.activity)
+        self.adapter = self.adapter_monitor.adapter
         if self.adapter is None:
             raise bleekWareError('Bluetooth is not supported on this device')
-        if self.adapter.getState() != BluetoothAdapter.STATE_ON:
+        if not self.adapter_monitor.is_on:
             raise bleekWareError('Bluetooth is turned off')
+        self._adapter_lost = False
+        self._link_lost = False
+        self.adapter_monitor.clients.add(self)
 
         if self.gatt is not None:
-            self.gatt.connect()
+            with self.tracer.span('gatt.connect', address=self._address):
+                self.gatt.connect()
         else:
             # The services list will be re-filled by a callback later on.
             self.__services.clear()
 
             # Create a GATT connection
             self.gatt_callback = _PythonGattCallback(self)
-            self.gatt = self.device.connectGatt(
-                self.activity, False, self.gatt_callback
-            )
+            with self.tracer.span('connectGatt', address=self._address):
+                self.gatt = self.device.connectGatt(
+                    self.activity, False, self.gatt_callback
+                )
             self.gatt_callback.gatt = self.gatt
 
             # Wait for the services to be received through the
             # _PythonGattCallback.onServicesDiscovered call.
-            while not self.__services:
-                await asyncio.sleep(0.1)
+            try:
+                await self._wait_for(lambda: self.__services)
+            except bleekWareError:
+                self._close_gatt()
+                raise
 
             # Ask for max Mtu size
-            self.gatt.requestMtu(517)
+            with self.tracer.span('requestMtu', address=self._address):
+                self.gatt.requestMtu(517)
 
         return True  # For Bleak backwards compatibility
 
     async def disconnect(self):
         """Disconnect from connected GATT server."""
+        for writer in list(self._l2cap_writers):
+            writer.close()
+        self._l2cap_writers.clear()
+
+        self._reconnect = False
+        if self._restore_task is not None:
+            self._restore_task.cancel()
+        self._notifying.clear()
+        if self.adapter_monitor is not None:
+            self.adapter_monitor.clients.discard(self)
+
         if self.gatt is None:
             return True
         try:
-            self.gatt.disconnect()
-            self.gatt.close()
+            with self.tracer.span('disconnect', address=self._address):
+                self.gatt.disconnect()
+                self.gatt.close()
         except Exception as e:
             logger.error(f'Error disconnecting from client: "{e}"')
 
         self.gatt = None
+        self._fail_descriptor_writes()
         self._received_data.clear()
         self.__services.clear()
 
         return True  # For Bleak backwards compatibility
 
+    async def open_l2cap(
+        self, psm, secure=True, buffer_size=L2CAP_BUFFER_SIZE
+    ):
+        """Open an L2CAP connection-oriented channel to the device.
+
+        ``psm`` is the Protocol/Service Multiplexer of the channel
+        as published by the device. Returns a tuple of
+        (asyncio.StreamReader, asyncio.StreamWriter).
+        Requires Android 10 or newer.
+        """
+        if Build.VERSION.SDK_INT < 29:  # Android 9 and older
+            raise bleekWareError('L2CAP channels require Android 10 or newer')
+
+        if secure:
+            socket = self.device.createL2capChannel(psm)
+        else:
+            socket = self.device.createInsecureL2capChannel(psm)
+
+        # BluetoothSocket.connect() is blocking
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, socket.connect)
+        except Exception as e:
+            socket.close()
+            raise bleekWareError(f'Could not open L2CAP channel: {e}')
+
+        reader, writer = await _open_l2cap_stream(socket, buffer_size)
+        self._l2cap_writers[writer] = asyncio.ensure_future(
+            self._forget_l2cap_writer(writer)
+        )
+        return reader, writer
+
+    async def _forget_l2cap_writer(self, writer):
+        """Drop an L2CAP channel once it is closed. PRIVATE."""
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass  # Errors are raised to the user of the stream
+        self._l2cap_writers.pop(writer, None)
+
     async def start_notify(self, uuid, callback, **kwargs):
         """Start notification of a notifying characteristic.
 
         ``uuid`` (characteristic specifier) must be an UUID as string
         ``callback`` can be a usual or async callback method
+
+        Returns when the device confirmed the subscription.
         """
         if not self.is_connected:
             raise bleekWareError('Client not connected')
+        if self._find_characteristic(uuid) is None:
+            raise bleekWareCharacteristicNotFoundError(uuid)
+        await self.start_notify_many({uuid: callback})
 
-        self.notification_callback = callback
-        characteristic = self._find_characteristic(uuid)
-        if characteristic:
-            self.loop = asyncio.get_event_loop()
-            self.gatt.setCharacteristicNotification(characteristic, True)
-            descriptor = characteristic.getDescriptor(UUID.fromString(CCCD))
-            descriptor.setValue(
-                BluetoothGattDescriptor.ENABLE_NOTIFICATION_VALUE
-            )
-            self.gatt.writeDescriptor(descriptor)
+    async def start_notify_many(self, callbacks):
+        """Start notification of several characteristics at once.
+
+        ``callbacks`` is a dictionary of characteristic UUIDs (as
+        string) and their callback methods.
+
+        The writes to the characteristics' configuration descriptors
+        are sent back-to-back. Returns when all subscriptions are
+        confirmed; raises bleekWareNotificationError with the failed
+        characteristics otherwise. Notifications are indications, if
+        the characteristic only supports indications.
+        """
+        if not self.is_connected:
+            raise bleekWareError('Client not connected')
+
+        self.loop = asyncio.get_running_loop()
+        failed = {}
+        pending = {}
+        with self.tracer.async_span('start_notify', address=self._address):
+            for uuid, callback in callbacks.items():
+                characteristic = self._find_characteristic(uuid)
+                if characteristic is None:
+                    failed[uuid] = 'Characteristic not found'
+                    continue
+                properties = characteristic.getProperties()
+                if properties & PROPERTY_NOTIFY:
+                    value = BluetoothGattDescriptor.ENABLE_NOTIFICATION_VALUE
+                elif properties & PROPERTY_INDICATE:
+                    value = BluetoothGattDescriptor.ENABLE_INDICATION_VALUE
+                else:
+                    failed[uuid] = 'Notifications not supported'
+                    continue
+                descriptor = characteristic.getDescriptor(
+                    UUID.fromString(CCCD)
+                )
+                if descriptor is None:
+                    failed[uuid] = 'Configuration descriptor not found'
+                    continue
+
+                # Register the callback first to not miss a notification
+                self._notifying[normalize_uuid(uuid)] = callback
+                self.gatt.setCharacteristicNotification(characteristic, True)
+                pending[uuid] = (
+                    characteristic,
+                    self._write_descriptor(descriptor, value),
+                )
+
+            for uuid, (characteristic, future) in pending.items():
+                status = await future
+                if status != BluetoothGatt.GATT_SUCCESS:
+                    failed[uuid] = f'Descriptor write failed ({status})'
+                    self._notifying.pop(normalize_uuid(uuid), None)
+                    if self.gatt is not None:
+                        self.gatt.setCharacteristicNotification(
+                            characteristic, False
+                        )
+
+        if failed:
+            raise bleekWareNotificationError(failed)
 
     async def stop_notify(self, uuid):
         """Stop notification of a notifying characteristic."""
         characteristic = self._find_characteristic(uuid)
         if characteristic:
-            self.gatt.setCharacteristicNotification(characteristic, False)
-            descriptor = characteristic.getDescriptor(UUID.fromString(CCCD))
-            descriptor.setValue(
-                BluetoothGattDescriptor.DISABLE_NOTIFICATION_VALUE
-            )
-            self.gatt.writeDescriptor(descriptor)
+            self.loop = asyncio.get_running_loop()
+            with self.tracer.async_span(
+                'stop_notify', address=self._address, characteristic=uuid
+            ):
+                self.gatt.setCharacteristicNotification(characteristic, False)
+                descriptor = characteristic.getDescriptor(
+                    UUID.fromString(CCCD)
+                )
+                if descriptor is not None:
+                    await self._write_descriptor(
+                        descriptor,
+                        BluetoothGattDescriptor.DISABLE_NOTIFICATION_VALUE,
+                    )
 
-            self.notification_callback = None
+            self._notifying.pop(normalize_uuid(uuid), None)
 
     async def read_gatt_char(self, uuid):
         """Read from a characteristic.
@@ -260,10 +677,12 @@ class Client:
         """
         characteristic = self._find_characteristic(uuid)
         if characteristic:
-            self.gatt.readCharacteristic(characteristic)
-            while not self._received_data:
-                await asyncio.sleep(0.1)
-            return bytearray(self._received_data.pop())
+            with self.tracer.async_span(
+                'read_gatt_char', address=self._address, characteristic=uuid
+            ):
+                self.gatt.readCharacteristic(characteristic)
+                await self._wait_for(lambda: self._received_data)
+            return self._convert_received(self._received_data.pop())
         else:
             raise bleekWareCharacteristicNotFoundError(uuid)
 
@@ -293,12 +712,18 @@ class Client:
             else:
                 write_type = BluetoothGattCharacteristic.WRITE_TYPE_NO_RESPONSE
 
-            if Build.VERSION.SDK_INT < 33:  # Android 12 and older
-                characteristic.setWriteType(write_type)
-                characteristic.setValue(data)
-                self.gatt.writeCharacteristic(characteristic)
-            else:
-                self.gatt.writeCharacteristic(characteristic, data, write_type)
+            data = self._convert_to_send(data)
+            with self.tracer.span(
+                'write_gatt_char', address=self._address, characteristic=uuid
+            ):
+                if Build.VERSION.SDK_INT < 33:  # Android 12 and older
+                    characteristic.setWriteType(write_type)
+                    characteristic.setValue(data)
+                    self.gatt.writeCharacteristic(characteristic)
+                else:
+                    self.gatt.writeCharacteristic(
+                        characteristic, data, write_type
+                    )
         else:
             raise bleekWareCharacteristicNotFoundError(uuid)
 
@@ -331,12 +756,215 @@ class Client:
         self.__services.clear()
         self.__services.extend(value)
 
+    async def _wait_for(self, condition):
+        """Wait until an Android callback fulfills 'condition'. PRIVATE.
+
+        Fails immediately if the adapter is turned off or the device
+        disconnects meanwhile.
+        """
+        while not condition():
+            if self._adapter_lost:
+                raise bleekWareError('Bluetooth was turned off')
+            if self._link_lost:
+                raise bleekWareError('Device disconnected')
+            await asyncio.sleep(0.1)
+
+    def _close_gatt(self):
+        """Close the GATT connection and drop its state. PRIVATE."""
+        if self.gatt is None:
+            return
+        try:
+            self.gatt.close()
+        except Exception as e:
+            logger.error(f'Error closing connection to client: "{e}"')
+        self.gatt = None
+        self._fail_descriptor_writes()
+        self._received_data.clear()
+        self.__services.clear()
+
+    def _adapter_turned_off(self):
+        """Drop the connection of an adapter turned off. PRIVATE."""
+        if self.gatt is None:
+            return
+        self._adapter_lost = True
+        self._reconnect = self.auto_reconnect
+        self._close_gatt()
+
+    def _adapter_turned_on(self):
+        """Reconnect when the adapter is back on. PRIVATE."""
+        if not self._reconnect or self._restore_task is not None:
+            return
+        self._restore_task = self.adapter_monitor.loop.create_task(
+            self._restore()
+        )
+
+    async def _restore(self):
+        """Reconnect and restart notifications. PRIVATE.
+
+        Failed attempts (e.g. if the device is out of range) are
+        retried with increasing delays until the connection succeeds,
+        the adapter is turned off again or disconnect() is called.
+        """
+        delay = 1
+        try:
+            while self._reconnect and self.adapter_monitor.is_on:
+                logger.info(f'Reconnecting to {self._address}')
+                try:
+                    await self.connect()
+                    if self._notifying:
+                        await self.start_notify_many(dict(self._notifying))
+                except Exception as e:
+                    logger.error(f'Error reconnecting to client: "{e}"')
+                    self._close_gatt()
+                else:
+                    self._reconnect = False
+                    return
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, RECONNECT_MAX_DELAY)
+        finally:
+            self._restore_task = None
+
+    def _write_descriptor(self, descriptor, value):
+        """Queue a descriptor write. PRIVATE.
+
+        Returns a future, which receives the GATT status of the write.
+        Android allows only one descriptor write at a time, so the next
+        write is sent directly from the onDescriptorWrite callback.
+
+        '_descriptor_in_flight' is set while a write is being sent or
+        waits for its confirmation. '_descriptor_sending' is set while a
+        thread runs _send_descriptor_write(); only the thread which sets
+        it sends writes, and only this thread releases both flags.
+        """
+        future = self.loop.create_future()
+        with self._descriptor_lock:
+            self._descriptor_writes.append((descriptor, value, future))
+            start = not self._descriptor_in_flight
+            if start:
+                self._descriptor_in_flight = True
+                self._descriptor_sending = True
+        if start:
+            self._send_descriptor_write()
+        return future
+
+    def _send_descriptor_write(self):
+        """Send the first queued descriptor write to Android. PRIVATE.
+
+        Must only be called by the thread which set the sending flag.
+        """
+        while True:
+            with self._descriptor_lock:
+                if not self._descriptor_writes:
+                    self._descriptor_in_flight = False
+                    self._descriptor_sending = False
+                    return
+                descriptor, value, future = self._descriptor_writes[0]
+            characteristic = (
+                descriptor.getCharacteristic().getUuid()
+                if self.tracer.enabled
+                else None
+            )
+            with self.tracer.span(
+                'writeDescriptor',
+                address=self._address,
+                characteristic=characteristic,
+            ):
+                if self.gatt is None:
+                    started = False
+                elif Build.VERSION.SDK_INT < 33:  # Android 12 and older
+                    descriptor.setValue(value)
+                    started = self.gatt.writeDescriptor(descriptor)
+                else:
+                    started = (
+                        self.gatt.writeDescriptor(descriptor, value)
+                        == STATUS_SUCCESS
+                    )
+            with self._descriptor_lock:
+                # The queue may have changed meanwhile: the write may be
+                # confirmed already or failed by a disconnect
+                current = (
+                    self._descriptor_writes
+                    and self._descriptor_writes[0][2] is future
+                )
+                if started:
+                    if current:
+                        # Wait for onDescriptorWrite to send the next one
+                        self._descriptor_sending = False
+                        return
+                    continue
+                if current:
+                    self._descriptor_writes.popleft()
+            # Android refused the write, continue with the next one
+            self.loop.call_soon_threadsafe(
+                self._set_status, future, BluetoothGatt.GATT_FAILURE
+            )
+
+    def _descriptor_written(self, status):
+        """Handle the confirmation of a descriptor write. PRIVATE.
+
+        If the sending thread is still active, it sends the next write.
+        """
+        with self._descriptor_lock:
+            if not self._descriptor_in_flight or not self._descriptor_writes:
+                return
+            _, _, future = self._descriptor_writes.popleft()
+            start = not self._descriptor_sending
+            if start:
+                self._descriptor_sending = True
+        self.loop.call_soon_threadsafe(self._set_status, future, status)
+        if start:
+            self._send_descriptor_write()
+
+    def _fail_descriptor_writes(self):
+        """Fail all queued descriptor writes, e.g. on disconnect. PRIVATE.
+
+        A running sender releases the flags itself, when it finds the
+        queue empty.
+        """
+        with self._descriptor_lock:
+            writes = list(self._descriptor_writes)
+            self._descriptor_writes.clear()
+            if not self._descriptor_sending:
+                self._descriptor_in_flight = False
+        for _, _, future in writes:
+            self.loop.call_soon_threadsafe(
+                self._set_status, future, BluetoothGatt.GATT_FAILURE
+            )
+
+    @staticmethod
+    def _set_status(future, status):
+        if not future.done():
+            future.set_result(status)
+
+    def _convert_received(self, value):
+        """Convert received Java bytes to bytearray or memoryview. PRIVATE."""
+        if self.raw_data:
+            return java_bytes_to_python(value, raw_data=True)
+        return bytearray(value)
+
+    def _convert_to_send(self, data):
+        """Copy data into a re-usable Java byte array. PRIVATE.
+
+        'data' can be any object supporting the buffer protocol. The
+        Java arrays are kept per payload size, so streaming packets of
+        the same size don't create a new Java array for each write.
+        Android copies the value during the write call, thus the array
+        can be safely re-used for the next write.
+        """
+        view = memoryview(data).cast('B')
+        buffer = self._write_buffers.get(view.nbytes)
+        if buffer is None:
+            if len(self._write_buffers) >= WRITE_BUFFER_POOL_SIZE:
+                del self._write_buffers[next(iter(self._write_buffers))]
+            buffer = jarray(jbyte)(view.tobytes())
+            self._write_buffers[view.nbytes] = buffer
+        else:
+            memoryview(buffer).cast('B')[:] = view
+        return buffer
+
     def _find_characteristic(self, uuid):
         """Find and return characteristic object by UUID. PRIVATE."""
-        if len(uuid) == 4:
-            uuid = f'0000{uuid}-0000-1000-8000-00805f9b34fb'
-        elif len(uuid) == 8:
-            uuid = f'{uuid}-0000-1000-8000-00805f9b34fb'
+        uuid = normalize_uuid(uuid)
         for service in self.__services:
             if uuid in service.characteristics:
                 return service.service.getCharacteristic(UUID.fromString(uuid))
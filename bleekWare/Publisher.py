@@ -0,0 +1,458 @@
+"""
+bleekWare.Publisher
+
+Stream scan results and notifications to other local processes.
+
+The Publisher serves the data over a Unix domain socket to any number
+of Subscribers. Messages are sent in a compact binary format: each
+frame starts with its length (4 bytes) and type (1 byte).
+
+This module doesn't import any Android classes, so Subscribers can
+run in any Python process.
+"""
+
+import asyncio
+import collections
+import struct
+
+from . import AdvertisementData, BLEDevice, logger, normalize_uuid
+
+
+ADVERTISEMENT = 0x01
+NOTIFICATION = 0x02
+SUBSCRIBE = 0x10
+
+# Frames above this length (type and payload) are rejected
+MAX_FRAME_SIZE = 1024 * 1024
+
+# Message types for the subscription filter
+ADVERTISEMENTS = 0x01
+NOTIFICATIONS = 0x02
+
+_FRAME_HEADER = struct.Struct('>IB')
+_LENGTH = struct.Struct('>H')
+_COUNT = struct.Struct('>B')
+_COMPANY_ID = struct.Struct('>H')
+_SIGNAL = struct.Struct('>hh')  # RSSI, tx power
+
+_NONE = 0xFFFF  # Length of a missing string
+_NO_TX_POWER = -32768
+_NO_UUIDS = 0xFF
+
+Advertisement = collections.namedtuple(
+    'Advertisement', ['device', 'advertisement_data']
+)
+Notification = collections.namedtuple(
+    'Notification', ['address', 'characteristic', 'data']
+)
+
+
+class _Writer:
+    """Collect the parts of a message. PRIVATE."""
+
+    def __init__(self):
+        self.parts = []
+
+    def bytes(self, data):
+        self.parts.append(_LENGTH.pack(len(data)))
+        self.parts.append(bytes(data))
+
+    def string(self, text):
+        if text is None:
+            self.parts.append(_LENGTH.pack(_NONE))
+        else:
+            self.bytes(text.encode())
+
+    def strings(self, texts):
+        self.parts.append(_LENGTH.pack(len(texts)))
+        for text in texts:
+            self.string(text)
+
+    def frame(self, message_type):
+        body = b''.join(self.parts)
+        if len(body) + 1 > MAX_FRAME_SIZE:
+            raise ValueError('Message exceeds the maximum frame size')
+        return _FRAME_HEADER.pack(len(body) + 1, message_type) + body
+
+
+class _Reader:
+    """Read the parts of a message. PRIVATE."""
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, structure):
+        values = structure.unpack_from(self.data, self.offset)
+        self.offset += structure.size
+        return values
+
+    def bytes(self):
+        (length,) = self.unpack(_LENGTH)
+        data = bytes(self.data[self.offset : self.offset + length])
+        self.offset += length
+        return data
+
+    def string(self):
+        (length,) = _LENGTH.unpack_from(self.data, self.offset)
+        if length == _NONE:
+            self.offset += _LENGTH.size
+            return None
+        return self.bytes().decode()
+
+    def strings(self):
+        (count,) = self.unpack(_LENGTH)
+        return [self.string() for _ in range(count)]
+
+
+def encode_advertisement(device, advertisement_data):
+    """Return the frame of a scan result."""
+    writer = _Writer()
+    writer.string(device.address)
+    writer.string(device.name)
+    writer.string(advertisement_data.local_name)
+    tx_power = advertisement_data.tx_power
+    writer.parts.append(
+        _SIGNAL.pack(
+            advertisement_data.rssi,
+            _NO_TX_POWER if tx_power is None else tx_power,
+        )
+    )
+    writer.parts.append(_COUNT.pack(len(advertisement_data.manufacturer_data)))
+    for company_id, data in advertisement_data.manufacturer_data.items():
+        writer.parts.append(_COMPANY_ID.pack(company_id))
+        writer.bytes(data)
+    writer.parts.append(_COUNT.pack(len(advertisement_data.service_data)))
+    for service_uuid, data in advertisement_data.service_data.items():
+        writer.string(service_uuid)
+        writer.bytes(data)
+    service_uuids = advertisement_data.service_uuids
+    if service_uuids is None:
+        writer.parts.append(_COUNT.pack(_NO_UUIDS))
+    else:
+        writer.parts.append(_COUNT.pack(len(service_uuids)))
+        for service_uuid in service_uuids:
+            writer.string(service_uuid)
+    return writer.frame(ADVERTISEMENT)
+
+
+def decode_advertisement(payload):
+    """Return an Advertisement from the payload of a frame."""
+    reader = _Reader(payload)
+    address = reader.string()
+    name = reader.string()
+    local_name = reader.string()
+    rssi, tx_power = reader.unpack(_SIGNAL)
+    (count,) = reader.unpack(_COUNT)
+    manufacturer_data = {}
+    for _ in range(count):
+        (company_id,) = reader.unpack(_COMPANY_ID)
+        manufacturer_data[company_id] = reader.bytes()
+    (count,) = reader.unpack(_COUNT)
+    service_data = {}
+    for _ in range(count):
+        service_uuid = reader.string()
+        service_data[service_uuid] = reader.bytes()
+    (count,) = reader.unpack(_COUNT)
+    service_uuids = (
+        None
+        if count == _NO_UUIDS
+        else [reader.string() for _ in range(count)]
+    )
+    return Advertisement(
+        BLEDevice(address, name, None),
+        AdvertisementData(
+            local_name=local_name,
+            manufacturer_data=manufacturer_data,
+            service_data=service_data,
+            service_uuids=service_uuids,
+            tx_power=None if tx_power == _NO_TX_POWER else tx_power,
+            rssi=rssi,
+        ),
+    )
+
+
+def encode_notification(address, characteristic, data):
+    """Return the frame of a notification."""
+    writer = _Writer()
+    writer.string(address)
+    writer.string(characteristic)
+    writer.bytes(data)
+    return writer.frame(NOTIFICATION)
+
+
+def decode_notification(payload):
+    """Return a Notification from the payload of a frame."""
+    reader = _Reader(payload)
+    return Notification(reader.string(), reader.string(), reader.bytes())
+
+
+def encode_subscription(
+    message_types, addresses=(), service_uuids=(), characteristics=()
+):
+    """Return the frame of a subscription filter."""
+    writer = _Writer()
+    writer.parts.append(_COUNT.pack(message_types))
+    writer.strings(list(addresses))
+    writer.strings(list(service_uuids))
+    writer.strings(list(characteristics))
+    return writer.frame(SUBSCRIBE)
+
+
+class _Subscription:
+    """A connected subscriber with its filter and buffer. PRIVATE."""
+
+    def __init__(self, writer, max_buffer):
+        self.writer = writer
+        self.frames = collections.deque(maxlen=max_buffer)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.message_types = 0  # Nothing until the filter is received
+        self.addresses = set()
+        self.service_uuids = set()
+        self.characteristics = set()
+
+    def set_filter(self, payload):
+        reader = _Reader(payload)
+        (self.message_types,) = reader.unpack(_COUNT)
+        self.addresses = {address.upper() for address in reader.strings()}
+        self.service_uuids = {normalize_uuid(u) for u in reader.strings()}
+        self.characteristics = {normalize_uuid(u) for u in reader.strings()}
+
+    def wants(self, message_type, address, uuids):
+        if not self.message_types & message_type:
+            return False
+        if self.addresses and address.upper() not in self.addresses:
+            return False
+        if message_type == ADVERTISEMENTS:
+            wanted_uuids = self.service_uuids
+        else:
+            wanted_uuids = self.characteristics
+        return not wanted_uuids or not wanted_uuids.isdisjoint(uuids)
+
+    def put(self, frame):
+        """Buffer a frame, dropping the oldest one if the buffer is full."""
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(frame)
+        self.ready.set()
+
+    async def send(self):
+        """Send buffered frames until the connection is closed."""
+        try:
+            while True:
+                await self.ready.wait()
+                self.ready.clear()
+                frames = list(self.frames)
+                self.frames.clear()
+                self.writer.write(b''.join(frames))
+                await self.writer.drain()
+        except ConnectionError:
+            pass  # The subscriber is removed when the reading stops
+
+
+async def _read_frame(reader):
+    """Return type and payload of the next frame. PRIVATE.
+
+    Raises ConnectionError for a frame length, which can't be valid,
+    as the rest of the stream can't be trusted then.
+    """
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    length, message_type = _FRAME_HEADER.unpack(header)
+    if not 1 <= length <= MAX_FRAME_SIZE:
+        raise ConnectionError(f'Invalid frame length: {length}')
+    return message_type, await reader.readexactly(length - 1)
+
+
+class Publisher:
+    """Class to serve scan results and notifications to other processes.
+
+    Subscribers connect to the Unix domain socket at 'path' and send a
+    filter; then they receive all matching messages. Each subscriber
+    has a buffer of 'max_buffer' messages. If a subscriber can't keep
+    up, its oldest messages are dropped.
+    """
+
+    def __init__(self, path, max_buffer=256):
+        self.path = path
+        self.max_buffer = max_buffer
+        self.subscriptions = set()
+        self.loop = None
+        self._server = None
+        self._handlers = set()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self):
+        """Start serving on the Unix domain socket."""
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_unix_server(
+            self._serve, path=self.path
+        )
+
+    async def stop(self):
+        """Stop serving and disconnect all subscribers."""
+        if self._server is None:
+            return
+        self._server.close()
+        for subscription in list(self.subscriptions):
+            subscription.writer.close()
+        # Let the handlers see the closed connections and finish
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _serve(self, reader, writer):
+        """Handle a connected subscriber."""
+        subscription = _Subscription(writer, self.max_buffer)
+        self.subscriptions.add(subscription)
+        self._handlers.add(asyncio.current_task())
+        sender = asyncio.ensure_future(subscription.send())
+        try:
+            while True:
+                message_type, payload = await _read_frame(reader)
+                if message_type == SUBSCRIBE:
+                    subscription.set_filter(payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f'Error reading from subscriber: "{e}"')
+        finally:
+            self.subscriptions.discard(subscription)
+            self._handlers.discard(asyncio.current_task())
+            sender.cancel()
+            writer.close()
+            if subscription.dropped:
+                logger.warning(
+                    f'{subscription.dropped} messages dropped for subscriber'
+                )
+
+    def _publish(self, message_type, address, uuids, frame):
+        for subscription in self.subscriptions:
+            if subscription.wants(message_type, address, uuids):
+                subscription.put(frame)
+
+    def publish_advertisement(self, device, advertisement_data):
+        """Send a scan result to the subscribers.
+
+        Can be used as detection callback of a Scanner.
+        """
+        if self.loop is None or not self.subscriptions:
+            return
+        uuids = set(advertisement_data.service_uuids or ())
+        uuids.update(advertisement_data.service_data)
+        self.loop.call_soon_threadsafe(
+            self._publish,
+            ADVERTISEMENTS,
+            device.address,
+            uuids,
+            encode_advertisement(device, advertisement_data),
+        )
+
+    def publish_notification(self, address, characteristic, data):
+        """Send a notification to the subscribers.
+
+        'characteristic' is the characteristic's UUID as string.
+        Can be called from any thread.
+        """
+        if self.loop is None or not self.subscriptions:
+            return
+        characteristic = normalize_uuid(characteristic)
+        self.loop.call_soon_threadsafe(
+            self._publish,
+            NOTIFICATIONS,
+            address,
+            {characteristic},
+            encode_notification(address, characteristic, data),
+        )
+
+    def notification_callback(self, address):
+        """Return a notification callback for Client.start_notify().
+
+        The callback publishes the notifications of the device with
+        'address'.
+        """
+
+        def callback(characteristic, data):
+            self.publish_notification(
+                address, str(characteristic.getUuid()), data
+            )
+
+        return callback
+
+
+class Subscriber:
+    """Class to receive messages from a Publisher in another process.
+
+    Use it as asynchronous iterator, which yields Advertisement tuples
+    of (BLEDevice, AdvertisementData) and Notification tuples of
+    (address, characteristic, data). Empty filters let all messages of
+    the type pass. Iteration ends when the Publisher closes the
+    connection and raises ConnectionError on a corrupted stream.
+    """
+
+    def __init__(
+        self,
+        path,
+        advertisements=True,
+        notifications=True,
+        addresses=(),
+        service_uuids=(),
+        characteristics=(),
+    ):
+        self.path = path
+        self.message_types = (ADVERTISEMENTS if advertisements else 0) | (
+            NOTIFICATIONS if notifications else 0
+        )
+        self.addresses = addresses
+        self.service_uuids = service_uuids
+        self.characteristics = characteristics
+        self._reader = None
+        self._writer = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def connect(self):
+        """Connect to the Publisher and send the filter."""
+        self._reader, self._writer = await asyncio.open_unix_connection(
+            self.path
+        )
+        self._writer.write(
+            encode_subscription(
+                self.message_types,
+                self.addresses,
+                self.service_uuids,
+                self.characteristics,
+            )
+        )
+        await self._writer.drain()
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                message_type, payload = await _read_frame(self._reader)
+            except asyncio.IncompleteReadError:
+                raise StopAsyncIteration
+            if message_type == ADVERTISEMENT:
+                return decode_advertisement(payload)
+            elif message_type == NOTIFICATION:
+                return decode_notification(payload)
@@ -7,18 +7,41 @@ import inspect
 import time
 
 from java import jclass, jint, jvoid, Override, static_proxy
-from java.util import HashMap
+from java.util import ArrayList, HashMap
 
-from android.bluetooth.le import ScanCallback, ScanResult, ScanSettings
-from android.bluetooth import BluetoothAdapter
+from android.bluetooth.le import (
+    ScanCallback,
+    ScanFilter,
+    ScanResult,
+    ScanSettings,
+)
+from android.os import Build, ParcelUuid
 
-from . import BLEDevice, bleekWareError
-from . import check_for_permissions
+from . import AdvertisementData, BLEDevice, CallbackDispatcher
+from . import bleekWareError, logger
+from . import check_for_permissions, java_bytes_to_python, normalize_uuid
+from .Adapter import AdapterMonitor
+from .Tracer import null_tracer
 
 
-scan_result = {}
 async_callbacks = set()  # To keep reference for callbacks
 
+# PHY constants are given as values, as the fields of ScanSettings and
+# BluetoothDevice don't exist before Android 8
+# PHYs to scan on (primary advertising channel)
+SCAN_PHYS = {
+    'all': 255,  # ScanSettings.PHY_LE_ALL_SUPPORTED
+    '1m': 1,  # BluetoothDevice.PHY_LE_1M
+    'coded': 3,  # BluetoothDevice.PHY_LE_CODED
+}
+
+# PHYs reported in the scan result
+RESULT_PHYS = {
+    1: '1m',  # BluetoothDevice.PHY_LE_1M
+    2: '2m',  # BluetoothDevice.PHY_LE_2M
+    3: 'coded',  # BluetoothDevice.PHY_LE_CODED
+}
+
 
 class _PythonScanCallback(static_proxy(ScanCallback)):
     """Callback class for LE Scan. PRIVATE.
@@ -28,9 +51,9 @@ class _PythonScanCallback(static_proxy(ScanCallback)):
     It is not intended to call this class directly.
     """
 
-    def __init__(self, scanner):
+    def __init__(self, session):
         super(_PythonScanCallback, self).__init__()
-        self.scanner = scanner
+        self.session = session
 
     @Override(jvoid, [jint, ScanResult])
     def onScanResult(self, callbackType, scanResult):
@@ -38,142 +61,359 @@ class _PythonScanCallback(static_proxy(ScanCallback)):
 
         This is the callback method for BluetoothLeScanner.startScan().
         """
-        device = scanResult.getDevice()
-        record = scanResult.getScanRecord()
+        tracer = self.session.tracer
+        if not tracer.enabled:
+            self.session.handle_scan_result(scanResult)
+            return
+        with tracer.span(
+            'onScanResult', address=scanResult.getDevice().getAddress()
+        ):
+            self.session.handle_scan_result(scanResult)
+
+
+class _ScanSession:
+    """The hardware scan shared by all running scanners. PRIVATE.
+
+    Each running Scanner subscribes to the session. The native scan
+    is started with the first subscriber and stopped when the last one
+    unsubscribes. Its settings and ScanFilters are the union of those
+    of the subscribers; if the union changes, the native scan is
+    restarted. Results are routed to the subscribers through an index
+    of their service UUIDs.
+    """
+
+    session = None
+
+    def __init__(self, adapter_monitor):
+        self.adapter_monitor = adapter_monitor
+        self.adapter = adapter_monitor.adapter
+        self.subscribers = set()
+        self.unfiltered = set()  # Subscribers without service UUIDs
+        self.by_service_uuid = {}
+        self.callback = _PythonScanCallback(self)
+        self.leScanner = None
+        self.config = None
+
+    @classmethod
+    def get(cls, adapter_monitor):
+        """Return the running session or create a new one."""
+        if cls.session is None:
+            cls.session = cls(adapter_monitor)
+            adapter_monitor.scanners.add(cls.session)
+        return cls.session
+
+    @property
+    def tracer(self):
+        """Return the tracer of the first subscriber having one."""
+        for scanner in self.subscribers:
+            if scanner.tracer is not null_tracer:
+                return scanner.tracer
+        return null_tracer
+
+    def subscribe(self, scanner):
+        """Add a scanner; it is removed again if the scan fails."""
+        self.subscribers.add(scanner)
+        if scanner.service_uuids:
+            for uuid in scanner.service_uuids:
+                self.by_service_uuid.setdefault(
+                    normalize_uuid(uuid), set()
+                ).add(scanner)
+        else:
+            self.unfiltered.add(scanner)
+        try:
+            self._update()
+        except Exception:
+            self._remove(scanner)
+            try:
+                self._update()  # Restart the scan for the others
+            except Exception as e:
+                logger.error(f'Error restarting scan: "{e}"')
+            raise
+
+    def unsubscribe(self, scanner):
+        self._remove(scanner)
+        self._update()
+
+    def _remove(self, scanner):
+        self.subscribers.discard(scanner)
+        self.unfiltered.discard(scanner)
+        for uuid in list(self.by_service_uuid):
+            self.by_service_uuid[uuid].discard(scanner)
+            if not self.by_service_uuid[uuid]:
+                del self.by_service_uuid[uuid]
+
+    def _combined_config(self):
+        """Return the union of the subscribers' settings and filters."""
+        scan_mode = max(scanner.scan_mode for scanner in self.subscribers)
+        legacy = all(scanner.legacy for scanner in self.subscribers)
+        phys = {scanner.phy for scanner in self.subscribers} - {None}
+        if not phys:
+            phy = None
+        elif len(phys) == 1:
+            phy = phys.pop()
+        else:
+            phy = 'all'
+        service_uuids = (
+            None if self.unfiltered else frozenset(self.by_service_uuid)
+        )
+        return scan_mode, legacy, phy, service_uuids
+
+    def _update(self):
+        """Start, restart or stop the native scan as required."""
+        if not self.subscribers:
+            self._stop_scan()
+            self.adapter_monitor.scanners.discard(self)
+            _ScanSession.session = None
+            return
+        config = self._combined_config()
+        if config == self.config and self.leScanner is not None:
+            return
+        self._stop_scan()
+        self.config = config
+        self._start_scan()
+
+    def _start_scan(self):
+        scan_mode, legacy, phy, service_uuids = self.config
+        scan_filters = None
+        if service_uuids is not None:
+            scan_filters = ArrayList()
+            for uuid in sorted(service_uuids):
+                scan_filters.add(
+                    ScanFilter.Builder()
+                    .setServiceUuid(ParcelUuid.fromString(uuid))
+                    .build()
+                )
+        le_scanner = self.adapter.getBluetoothLeScanner()
+        with self.tracer.span('startScan'):
+            le_scanner.startScan(
+                scan_filters,
+                self._build_scan_settings(scan_mode, legacy, phy),
+                self.callback,
+            )
+        # Only now the session is scanning; a failed start is retried
+        self.leScanner = le_scanner
 
-        address = device.getAddress()
+    def _stop_scan(self):
+        if self.leScanner is not None:
+            with self.tracer.span('stopScan'):
+                self.leScanner.stopScan(self.callback)
+            self.leScanner = None
 
-        new_device = BLEDevice(address, device.getName(), device)
+    def _build_scan_settings(self, scan_mode, legacy, phy):
+        """Return the ScanSettings for the native scan."""
+        scan_settings_builder = ScanSettings.Builder()
+        scan_settings_builder.setScanMode(scan_mode)
+        if legacy and phy is None:
+            return scan_settings_builder.build()
+
+        if Build.VERSION.SDK_INT < 26:  # Android 7 and older
+            logger.warning(
+                'Extended advertising and PHY selection require Android 8'
+            )
+            return scan_settings_builder.build()
+
+        if not legacy:
+            if not self.adapter.isLeExtendedAdvertisingSupported():
+                logger.warning(
+                    'Extended advertising is not supported by this adapter'
+                )
+            scan_settings_builder.setLegacy(False)
+        if phy is not None:
+            if legacy:
+                logger.warning('PHY selection requires legacy=False')
+            if phy == 'coded' and not self.adapter.isLeCodedPhySupported():
+                logger.warning('Coded PHY is not supported by this adapter')
+            scan_settings_builder.setPhy(SCAN_PHYS[phy])
+        return scan_settings_builder.build()
+
+    def _adapter_turned_off(self):
+        """Drop the scan of an adapter, which was turned off.
+
+        The session stays registered to restart the scan later on.
+        """
+        self.leScanner = None
+
+    def _adapter_turned_on(self):
+        """Restart the scan when the adapter is back on."""
+        if self.subscribers and self.leScanner is None:
+            logger.info('Restarting scan')
+            self._start_scan()
+
+    def handle_scan_result(self, scanResult):
+        """Route a scan result to the subscribed scanners."""
+        record = scanResult.getScanRecord()
 
         service_uuids = record.getServiceUuids()
+        subscribers = set(self.unfiltered)
         if service_uuids is not None:
             service_uuids = [
                 service_uuid.toString()
                 for service_uuid in service_uuids.toArray()  # was ArrayList
             ]
+            for uuid in service_uuids:
+                subscribers.update(self.by_service_uuid.get(uuid, ()))
+
+        if (
+            Build.VERSION.SDK_INT >= 26  # Android 8 and newer
+            and not scanResult.isLegacy()
+        ):
+            subscribers = {
+                scanner for scanner in subscribers if not scanner.legacy
+            }
+        if not subscribers:
+            return
+
+        # Convert the result once per combination of data options
+        results = {}
+        for scanner in subscribers:
+            options = (scanner.raw_data, scanner.retain_platform_objects)
+            if options not in results:
+                results[options] = _convert_scan_result(
+                    scanResult, record, service_uuids, *options
+                )
+            scanner._add_result(*results[options])
 
-            # Should probably use a ScanFilter on the startScan method,
-            # however, I'm doing this "post" result...
-            if self.scanner.service_uuids and not any(
-                uuid in self.scanner.service_uuids for uuid in service_uuids
-            ):
-                return
-        else:
-            if self.scanner.service_uuids:
-                return
 
-        manufacturer = record.getManufacturerSpecificData()
-        manufacturer = {
-            manufacturer.keyAt(index): bytes(manufacturer.valueAt(index))
-            for index in range(manufacturer.size())
-        }
-
-        # Original code from Bleak:
-        # service_data = {
-        #     entry.getKey().toString(): bytes(entry.getValue())
-        #     for entry in record.getServiceData().entrySet()
-        # }
-        # Need some workaround, as 'getServiceData().entrySet() is a Map
-        # and is not iterable with Chaquopy. So we need to handle the
-        # iteration by ourselves.
-        # Also, MapCollection need to be converted to HashMap, otherwise
-        # next() is not working.
-        service_data = {}
-        temp_map = HashMap(record.getServiceData())
-        service_data_iterator = temp_map.entrySet().iterator()
-        while service_data_iterator.hasNext():
-            element = service_data_iterator.next()
-            service_data[element.getKey().toString()] = bytes(
-                element.getValue()
-            )
+def _convert_scan_result(scanResult, record, service_uuids, raw_data, retain):
+    """Return BLEDevice and AdvertisementData of a scan result. PRIVATE."""
+    device = scanResult.getDevice()
+    new_device = BLEDevice(
+        device.getAddress(), device.getName(), device if retain else None
+    )
 
-        tx_power = (
-            None
-            if record.getTxPowerLevel() == -2147483648
-            else record.getTxPowerLevel()
+    manufacturer = record.getManufacturerSpecificData()
+    manufacturer = {
+        manufacturer.keyAt(index): java_bytes_to_python(
+            manufacturer.valueAt(index), raw_data
         )
-
-        advertisement = AdvertisementData(
-            local_name=record.getDeviceName(),
-            manufacturer_data=manufacturer,
-            service_data=service_data,
-            service_uuids=service_uuids,
-            tx_power=tx_power,
-            rssi=scanResult.getRssi(),
-            platform_data=(scanResult,),
+        for index in range(manufacturer.size())
+    }
+
+    # Original code from Bleak:
+    # service_data = {
+    #     entry.getKey().toString(): bytes(entry.getValue())
+    #     for entry in record.getServiceData().entrySet()
+    # }
+    # Need some workaround, as 'getServiceData().entrySet() is a Map
+    # and is not iterable with Chaquopy. So we need to handle the
+    # iteration by ourselves.
+    # Also, MapCollection need to be converted to HashMap, otherwise
+    # next() is not working.
+    service_data = {}
+    temp_map = HashMap(record.getServiceData())
+    service_data_iterator = temp_map.entrySet().iterator()
+    while service_data_iterator.hasNext():
+        element = service_data_iterator.next()
+        service_data[element.getKey().toString()] = java_bytes_to_python(
+            element.getValue(), raw_data
         )
 
-        scan_result[address] = (new_device, advertisement)
-        if self.scanner.detection_callback:
-            if inspect.iscoroutinefunction(self.scanner.detection_callback):
-                task = asyncio.create_task(
-                    self.scanner.detection_callback(new_device, advertisement)
-                )
-                async_callbacks.add(task)
-                task.add_done_callback(async_callbacks.discard)
-            else:
-                self.scanner.detection_callback(new_device, advertisement)
+    tx_power = (
+        None
+        if record.getTxPowerLevel() == -2147483648
+        else record.getTxPowerLevel()
+    )
+
+    extended = {}
+    if Build.VERSION.SDK_INT >= 26:  # Android 8 and newer
+        sid = scanResult.getAdvertisingSid()
+        interval = scanResult.getPeriodicAdvertisingInterval()
+        extended = {
+            'primary_phy': RESULT_PHYS.get(scanResult.getPrimaryPhy()),
+            'secondary_phy': RESULT_PHYS.get(scanResult.getSecondaryPhy()),
+            'advertising_sid': (
+                None if sid == ScanResult.SID_NOT_PRESENT else sid
+            ),
+            # Interval is given in units of 1.25 ms
+            'periodic_interval': interval * 1.25 if interval else None,
+        }
 
+    advertisement = AdvertisementData(
+        local_name=record.getDeviceName(),
+        manufacturer_data=manufacturer,
+        service_data=service_data,
+        service_uuids=service_uuids,
+        tx_power=tx_power,
+        rssi=scanResult.getRssi(),
+        platform_data=(scanResult,) if retain else tuple(),
+        **extended,
+    )
+    return new_device, advertisement
 
-class AdvertisementData:
-    """Class to hold advertisement data from a BLE device."""
 
-    def __init__(
-        self,
-        local_name=None,
-        manufacturer_data={},
-        service_data={},
-        service_uuids=[],
-        tx_power=None,
-        rssi=0,
-        platform_data=tuple(),
-    ):
-        self.local_name = local_name
-        self.manufacturer_data = manufacturer_data
-        self.service_data = service_data
-        self.service_uuids = service_uuids
-        self.tx_power = tx_power
-        self.rssi = rssi
-        self.platform_data = platform_data
-
-    def __repr__(self):
-        kwargs = []
-        if self.local_name:
-            kwargs.append(f'local_name={repr(self.local_name)}')
-        if self.manufacturer_data:
-            kwargs.append(f'manufacturer_data={repr(self.manufacturer_data)}')
-        if self.service_data:
-            kwargs.append(f'service_data={repr(self.service_data)}')
-        if self.service_uuids:
-            kwargs.append(f'service_uuids={repr(self.service_uuids)}')
-        if self.tx_power is not None:
-            kwargs.append(f'tx_power={repr(self.tx_power)}')
-        kwargs.append(f'rssi={repr(self.rssi)}')
-        return f"AdvertisementData({', '.join(kwargs)})"
+def _picklable_result(device, advertisement):
+    """Return a copy of a scan result without Java objects. PRIVATE.
+
+    Used to pass scan results to callbacks in a process pool.
+    """
+    return BLEDevice(device.address, device.name, None), AdvertisementData(
+        local_name=advertisement.local_name,
+        manufacturer_data={
+            company_id: bytes(data)
+            for company_id, data in advertisement.manufacturer_data.items()
+        },
+        service_data={
+            service_uuid: bytes(data)
+            for service_uuid, data in advertisement.service_data.items()
+        },
+        service_uuids=advertisement.service_uuids,
+        tx_power=advertisement.tx_power,
+        rssi=advertisement.rssi,
+        primary_phy=advertisement.primary_phy,
+        secondary_phy=advertisement.secondary_phy,
+        advertising_sid=advertisement.advertising_sid,
+        periodic_interval=advertisement.periodic_interval,
+    )
 
 
 class Scanner:
     """Class to scan for free (un-connected) Bluetooth LE devices."""
 
-    scanner = None
-
     def __init__(
         self,
         detection_callback=None,
         service_uuids=None,
         scanning_mode='active',
+        raw_data=False,
+        legacy=True,
+        phy=None,
+        callback_executor=None,
+        max_pending_callbacks=64,
+        max_callbacks_in_flight=1024,
+        retain_platform_objects=True,
+        tracer=None,
         **kwargs,
     ):
         self.activity = self.context = jclass(
             'org.beeware.android.MainActivity'
         ).singletonThis
         self.detection_callback = detection_callback
+        self.callback_dispatcher = (
+            None
+            if callback_executor is None
+            else CallbackDispatcher(
+                callback_executor,
+                max_pending_callbacks,
+                max_callbacks_in_flight,
+            )
+        )
         self.service_uuids = service_uuids
+        self.raw_data = raw_data
+        self.retain_platform_objects = retain_platform_objects
+        self.tracer = null_tracer if tracer is None else tracer
+        self.session = None
+        self._scan_result = {}
+        self._queues = set()
         if scanning_mode == 'passive':
             self.scan_mode = ScanSettings.SCAN_MODE_OPPORTUNISTIC
         else:
             self.scan_mode = ScanSettings.SCAN_MODE_LOW_LATENCY
-        scan_result.clear()
+        self.legacy = legacy
+        if phy is not None and phy not in SCAN_PHYS:
+            raise ValueError(
+                f"Unknown PHY '{phy}', use one of {', '.join(SCAN_PHYS)}"
+            )
+        self.phy = phy
 
     async def __aenter__(self):
         await self.start()
@@ -183,95 +423,182 @@ class Scanner:
         await self.stop()
 
     async def start(self):
-        """Start a scan for BLE devices."""
-        if Scanner.scanner is not None:
-            raise bleekWareError(
-                'A BleakScanner is already scanning on this adapter.'
-            )
+        """Start a scan for BLE devices.
 
-        scan_settings_builder = ScanSettings.Builder()
-        scan_settings_builder.setScanMode(self.scan_mode)
-        scan_settings = scan_settings_builder.build()
+        All running scanners share one hardware scan.
+        """
+        if self.session is not None:
+            raise bleekWareError('This Scanner is already scanning.')
 
         check_for_permissions(self.activity)
 
-        self.adapter = BluetoothAdapter.getDefaultAdapter()
+        self.adapter_monitor = AdapterMonitor.get(self.activity)
+        self.adapter = self.adapter_monitor.adapter
         if self.adapter is None:
             raise bleekWareError(
                 'Bluetooth is not supported on this hardware platform'
             )
-        if self.adapter.getState() != BluetoothAdapter.STATE_ON:
+        if not self.adapter_monitor.is_on:
             raise bleekWareError('Bluetooth is not turned on')
 
-        self.leScanner = self.adapter.getBluetoothLeScanner()
-        Scanner.scanner = self
+        self._scan_result.clear()
+        session = _ScanSession.get(self.adapter_monitor)
+        session.subscribe(self)
+        self.session = session
 
-        self.callback = _PythonScanCallback(Scanner.scanner)
+    async def stop(self):
+        """Stop a running scan."""
+        if self.session is not None:
+            self.session.unsubscribe(self)
+            self.session = None
 
-        scan_result.clear()
+    def _add_result(self, device, advertisement):
+        """Store a scan result and pass it on. PRIVATE.
 
-        # Could define a ScanFilter for name, address or service_uuids here
-        # (-->None), however, I keep the already working methods for now
-        self.leScanner.startScan(None, scan_settings, self.callback)
+        Called by the scan session for each matching scan result.
+        """
+        self._scan_result[device.address] = (device, advertisement)
+        for queue in self._queues:
+            queue.put_nowait((device, advertisement))
 
-    async def stop(self):
-        """Stop a running scan."""
-        if self.leScanner is not None:
-            self.leScanner.stopScan(self.callback)
-            Scanner.scanner = None
-            self.leScanner = None
+        if self.detection_callback:
+            if inspect.iscoroutinefunction(self.detection_callback):
+                task = asyncio.create_task(
+                    self.detection_callback(device, advertisement)
+                )
+                async_callbacks.add(task)
+                task.add_done_callback(async_callbacks.discard)
+            elif self.callback_dispatcher:
+                if self.callback_dispatcher.in_process:
+                    device, advertisement = _picklable_result(
+                        device, advertisement
+                    )
+                self.callback_dispatcher.submit(
+                    device.address,
+                    self.detection_callback,
+                    device,
+                    advertisement,
+                )
+            else:
+                with self.tracer.span(
+                    'detection_callback', address=device.address
+                ):
+                    self.detection_callback(device, advertisement)
 
     async def advertisement_data(self):
         """Provide an asynchronous generator.
 
         Tuples of (BLEDevice, AdvertismentData are yielded upon
-        detection.
+        detection. Several generators can be used at the same time.
         """
         devices = asyncio.Queue()
-        self.detection_callback = lambda device, data: devices.put_nowait(
-            (device, data)
-        )
+        self._queues.add(devices)
         try:
             while True:
                 yield await devices.get()
         finally:
-            self.detection_callback = None
+            self._queues.discard(devices)
 
     @property
     def discovered_devices(self):
         """Hold a list of found BLE devices."""
-        return [device for device, _ in scan_result.values()]
+        return [device for device, _ in self._scan_result.values()]
 
     @property
     def discovered_devices_and_advertisement_data(self):
         """Store BLE devices and their advertisemend data in dictionary."""
-        return scan_result
+        return self._scan_result
 
     @classmethod
-    async def discover(cls, timeout=5.0, return_adv=False, **kwargs):
+    async def discover(
+        cls,
+        timeout=5.0,
+        return_adv=False,
+        min_devices=None,
+        expected_addresses=None,
+        until=None,
+        stable_for=None,
+        **kwargs,
+    ):
         """Search for BLE devices and return result.
 
         Returns a list of BLE devices of type BLEDevice (if
         'return_adv' is False) or a dictionary ('return_adv' = True),
         where the keys are the devices addresses (as MAC or UUID) and
         the values tuples of BLEDevice, AdvertisementData.
+
+        The scan ends after 'timeout' seconds or as soon as one of the
+        optional stop conditions is met:
+        'min_devices': at least this number of devices was found
+        'expected_addresses': all of these addresses were found
+        'until': a function, which receives the dictionary of found
+        devices and advertisement data, returns True
+        'stable_for': no new device was found for this many seconds
         """
+        if expected_addresses is not None:
+            expected_addresses = {
+                address.lower() for address in expected_addresses
+            }
+
         async with cls(**kwargs) as scanner:
-            await asyncio.sleep(timeout)
+            start_time = last_new_time = time.time()
+            devices_found = 0
+            while time.time() < start_time + timeout:
+                await asyncio.sleep(0.1)
+                result = scanner.discovered_devices_and_advertisement_data
+                if len(result) > devices_found:
+                    devices_found = len(result)
+                    last_new_time = time.time()
+
+                if min_devices is not None and devices_found >= min_devices:
+                    break
+                if expected_addresses is not None and expected_addresses <= {
+                    address.lower() for address in result
+                }:
+                    break
+                if until is not None and until(result):
+                    break
+                if (
+                    stable_for is not None
+                    and time.time() - last_new_time >= stable_for
+                ):
+                    break
+
             if return_adv:
-                return scanner.discovered_devices_and_advertisement_data
+                return dict(scanner.discovered_devices_and_advertisement_data)
             else:
                 return scanner.discovered_devices
 
+    @classmethod
+    async def discover_iter(cls, timeout=5.0, return_adv=False, **kwargs):
+        """Search for BLE devices and yield each new device once.
+
+        Provides an asynchronous generator, which yields BLEDevice
+        objects (if 'return_adv' is False) or tuples of BLEDevice,
+        AdvertisementData ('return_adv' = True) as soon as a device is
+        found. The scan stops after 'timeout' seconds or when the
+        generator is closed.
+        """
+        async with cls(**kwargs) as scanner:
+            yielded = set()
+            start_time = time.time()
+            while time.time() < start_time + timeout:
+                result = scanner.discovered_devices_and_advertisement_data
+                for address, (device, data) in list(result.items()):
+                    if address not in yielded:
+                        yielded.add(address)
+                        yield (device, data) if return_adv else device
+                await asyncio.sleep(0.1)
+
     @classmethod
     async def _find_device(
         cls, name=None, address=None, timeout=10.0, **kwargs
     ):
         """Scan for and find a certain device by name or address. PRIVATE."""
-        async with cls(**kwargs):
+        async with cls(**kwargs) as scanner:
             start_time = time.time()
             while time.time() < start_time + timeout:
-                for device, _ in scan_result.values():
+                for device in scanner.discovered_devices:
                     if name and device.name == name:
                         return device
                     elif address and device.address.lower() == address.lower():
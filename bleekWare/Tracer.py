@@ -0,0 +1,142 @@
+"""
+bleekWare.Tracer
+
+Record a timeline of the Android calls and callbacks of Scanner and
+Client and export it in the Chrome Trace Event format, which can be
+viewed with https://ui.perfetto.dev or chrome://tracing.
+"""
+
+import collections
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    """Record trace events in a ring buffer of fixed size.
+
+    Once 'max_events' events are recorded, the oldest events are
+    dropped. Pass the tracer to Scanner or Client with the 'tracer'
+    keyword argument.
+    """
+
+    enabled = True
+
+    def __init__(self, max_events=10000):
+        self.events = collections.deque(maxlen=max_events)
+        self.thread_names = {}
+        self._pid = os.getpid()
+        self._span_ids = itertools.count(1)
+
+    def _add(self, phase, name, args, span_id=None):
+        thread = threading.current_thread()
+        self.thread_names[thread.ident] = thread.name
+        event = {
+            'name': name,
+            'cat': 'bleekWare',
+            'ph': phase,
+            'ts': time.perf_counter_ns() // 1000,
+            'pid': self._pid,
+            'tid': thread.ident,
+        }
+        if phase == 'i':
+            event['s'] = 't'  # Instant event on thread level
+        if span_id is not None:
+            event['id'] = span_id
+        args = {
+            key: str(value) for key, value in args.items() if value is not None
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def begin(self, name, **args):
+        """Record the begin of a span, e.g. an Android call."""
+        self._add('B', name, args)
+
+    def end(self, name, **args):
+        """Record the end of a span begun on the same thread."""
+        self._add('E', name, args)
+
+    def instant(self, name, **args):
+        """Record a single point in time, e.g. an Android callback."""
+        self._add('i', name, args)
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        """Record the code in a with statement as span."""
+        self.begin(name, **args)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    @contextlib.contextmanager
+    def async_span(self, name, **args):
+        """Record a coroutine section, which awaits, as span.
+
+        Unlike span(), these spans may overlap with other spans on
+        the same thread, e.g. while the event loop runs other tasks.
+        """
+        span_id = next(self._span_ids)
+        self._add('b', name, args, span_id)
+        try:
+            yield
+        finally:
+            self._add('e', name, {}, span_id)
+
+    def clear(self):
+        """Remove all recorded events."""
+        self.events.clear()
+
+    def export(self):
+        """Return the recorded events as Trace Event dictionary."""
+        metadata = [
+            {
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': self._pid,
+                'tid': ident,
+                'args': {'name': name},
+            }
+            for ident, name in list(self.thread_names.items())
+        ]
+        return {
+            'traceEvents': metadata + list(self.events),
+            'displayTimeUnit': 'ms',
+        }
+
+    def save(self, path):
+        """Write the recorded events as JSON file to 'path'."""
+        with open(path, 'w') as trace_file:
+            json.dump(self.export(), trace_file)
+
+
+class NullTracer:
+    """Tracer that doesn't record anything. Used if tracing is off.
+
+    Check 'enabled' before computing expensive event arguments.
+    """
+
+    enabled = False
+
+    def begin(self, name, **args):
+        pass
+
+    def end(self, name, **args):
+        pass
+
+    def instant(self, name, **args):
+        pass
+
+    def span(self, name, **args):
+        return contextlib.nullcontext()
+
+    def async_span(self, name, **args):
+        return contextlib.nullcontext()
+
+
+null_tracer = NullTracer()
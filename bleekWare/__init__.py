@@ -13,9 +13,11 @@ MIT license
 
 __version__ = '0.3.1'
 
+import collections
+import concurrent.futures
+import functools
 import logging
-from java import jclass
-from android.os import Build
+import threading
 
 
 # Set up logging for this module.
@@ -26,7 +28,8 @@ logger = logging.getLogger(name='bleakWare')
 class BLEDevice:
     """Class to hold data of a BLE device.
 
-    Note: 'details' is the OS native device.
+    Note: 'details' is the OS native device. It is None if the scanner
+    doesn't retain platform objects.
     """
 
     def __init__(self, address, name, details):
@@ -41,6 +44,74 @@ class BLEDevice:
         return f'BLEDevice({self.address}, {self.name})'
 
 
+class AdvertisementData:
+    """Class to hold advertisement data from a BLE device."""
+
+    def __init__(
+        self,
+        local_name=None,
+        manufacturer_data={},
+        service_data={},
+        service_uuids=[],
+        tx_power=None,
+        rssi=0,
+        platform_data=tuple(),
+        primary_phy='1m',
+        secondary_phy=None,
+        advertising_sid=None,
+        periodic_interval=None,
+    ):
+        self.local_name = local_name
+        self.manufacturer_data = manufacturer_data
+        self.service_data = service_data
+        self.service_uuids = service_uuids
+        self.tx_power = tx_power
+        self.rssi = rssi
+        self.platform_data = platform_data
+        self.primary_phy = primary_phy
+        self.secondary_phy = secondary_phy
+        self.advertising_sid = advertising_sid
+        self.periodic_interval = periodic_interval
+        self._beacons = None
+
+    def __repr__(self):
+        kwargs = []
+        if self.local_name:
+            kwargs.append(f'local_name={repr(self.local_name)}')
+        if self.manufacturer_data:
+            kwargs.append(f'manufacturer_data={repr(self.manufacturer_data)}')
+        if self.service_data:
+            kwargs.append(f'service_data={repr(self.service_data)}')
+        if self.service_uuids:
+            kwargs.append(f'service_uuids={repr(self.service_uuids)}')
+        if self.tx_power is not None:
+            kwargs.append(f'tx_power={repr(self.tx_power)}')
+        kwargs.append(f'rssi={repr(self.rssi)}')
+        if self.primary_phy != '1m':
+            kwargs.append(f'primary_phy={repr(self.primary_phy)}')
+        if self.secondary_phy:
+            kwargs.append(f'secondary_phy={repr(self.secondary_phy)}')
+        if self.advertising_sid is not None:
+            kwargs.append(f'advertising_sid={repr(self.advertising_sid)}')
+        if self.periodic_interval:
+            kwargs.append(
+                f'periodic_interval={repr(self.periodic_interval)}'
+            )
+        return f"AdvertisementData({', '.join(kwargs)})"
+
+    @property
+    def beacons(self):
+        """Return the list of decoded beacon frames.
+
+        The data are decoded with bleekWare.Beacon on first access.
+        """
+        if self._beacons is None:
+            from . import Beacon  # Beacon imports this module
+
+            self._beacons = Beacon.decode(self)
+        return self._beacons
+
+
 class bleekWareError(Exception):
     """Base Exception for bleekWare."""
 
@@ -71,6 +142,147 @@ class bleekWareDeviceNotFoundError(bleekWareError):
         self.identifier = identifier
 
 
+class CallbackDispatcher:
+    """Run callbacks in an executor and keep their order per key.
+
+    Calls with the same key (e.g. a device address) are run one after
+    the other in the order they were submitted, calls with different
+    keys may run in parallel. If more than 'max_pending' calls are
+    waiting for a key, the oldest waiting call is dropped, so a slow
+    callback can't pile up an unbounded backlog.
+
+    As every key may hold 'max_pending' calls, there is also a limit
+    for all keys together: at most 'max_in_flight' calls are submitted
+    to the executor or waiting. Beyond that, the oldest waiting call of
+    any key is dropped, or the new call, if no call is waiting.
+
+    'executor' is a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor. With a process pool, 'in_process' is True and
+    the callers must submit picklable arguments only.
+    """
+
+    def __init__(self, executor, max_pending=64, max_in_flight=1024):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.max_in_flight = max_in_flight
+        self.in_process = isinstance(
+            executor, concurrent.futures.ProcessPoolExecutor
+        )
+        self._pending = {}  # Key is present while a call is running
+        # Waiting calls of all keys in order of submission. A call is a
+        # list [callback, args], which is emptied when it is taken or
+        # dropped; emptied calls are skipped and cleaned up lazily.
+        self._waiting = collections.deque()
+        self._waiting_count = 0
+        self._submitted = 0
+        self._lock = threading.Lock()
+
+    def submit(self, key, callback, *args):
+        """Run 'callback(*args)' after all earlier calls for 'key'."""
+        with self._lock:
+            full = self._submitted + self._waiting_count >= self.max_in_flight
+            if full and not self._drop_oldest():
+                logger.warning(f'Dropped a callback for {key}')
+                return
+            pending = self._pending.get(key)
+            if pending is not None:
+                while pending and pending[0][0] is None:
+                    pending.popleft()  # Dropped by _drop_oldest()
+                if len(pending) >= self.max_pending:
+                    self._drop(pending.popleft())
+                    logger.warning(f'Dropped a pending callback for {key}')
+                call = [callback, args]
+                pending.append(call)
+                self._waiting.append(call)
+                self._waiting_count += 1
+                return
+            self._pending[key] = collections.deque()
+            self._submitted += 1  # Counted before it is submitted
+        self._run(key, callback, args)
+
+    def _drop(self, call):
+        """Empty a waiting call. Must be called with the lock held."""
+        if call[0] is not None:
+            call[:] = [None, None]
+            self._waiting_count -= 1
+
+    def _drop_oldest(self):
+        """Drop the oldest waiting call of all keys.
+
+        Must be called with the lock held. Returns False if no call is
+        waiting. Dropped calls stay in their key's deque and are skipped.
+        """
+        while self._waiting:
+            call = self._waiting.popleft()
+            if call[0] is not None:
+                self._drop(call)
+                logger.warning('Dropped the oldest pending callback')
+                return True
+        return False
+
+    def _run(self, key, callback, args):
+        """Submit a call; skip to the next one if the executor fails."""
+        while True:
+            try:
+                future = self.executor.submit(callback, *args)
+            except Exception as e:
+                logger.error(f'Could not run callback: "{e}"')
+                call = self._next(key)
+                if call is None:
+                    return
+                callback, args = call
+            else:
+                future.add_done_callback(functools.partial(self._done, key))
+                return
+
+    def _next(self, key):
+        """Take the next waiting call for 'key' or release the key.
+
+        The finished call's slot is passed on to the next call.
+        """
+        with self._lock:
+            pending = self._pending[key]
+            while pending:
+                call = pending.popleft()
+                if call[0] is not None:
+                    callback, args = call
+                    self._drop(call)
+                    self._compact()
+                    return callback, args
+            del self._pending[key]
+            self._submitted -= 1
+            return None
+
+    def _compact(self):
+        """Remove emptied calls from the waiting list (lock held)."""
+        if len(self._waiting) > 2 * self._waiting_count + self.max_pending:
+            self._waiting = collections.deque(
+                call for call in self._waiting if call[0] is not None
+            )
+
+    def _done(self, key, future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f'Error in callback: "{future.exception()}"')
+        call = self._next(key)
+        if call is not None:
+            self._run(key, *call)
+
+
+class bleekWareNotificationError(bleekWareError):
+    """Notifications couldn't be started for some characteristics."""
+
+    def __init__(self, failed):
+        """
+        Args:
+            failed (dict): UUIDs of the characteristics which failed and
+            the reasons of the failures
+        """
+        super().__init__(
+            f"Notifications couldn't be started for {', '.join(failed)}"
+        )
+        self.failed = failed
+
+
 class BLEGattService:
     def __init__(self, service):
         self.service = service
@@ -78,6 +290,29 @@ class BLEGattService:
         self.descriptors = []
 
 
+def normalize_uuid(uuid):
+    """Return the 128-bit form of a 16-bit or 32-bit UUID string."""
+    uuid = uuid.lower()
+    if len(uuid) == 4:
+        return f'0000{uuid}-0000-1000-8000-00805f9b34fb'
+    elif len(uuid) == 8:
+        return f'{uuid}-0000-1000-8000-00805f9b34fb'
+    return uuid
+
+
+def java_bytes_to_python(value, raw_data=False):
+    """Convert a Java byte array into a Python object.
+
+    Returns a copy as 'bytes' or, if 'raw_data' is True, a 'memoryview'
+    of unsigned bytes directly over the Java array, avoiding the copy.
+    The memoryview shares its memory with the Java array, so use
+    bytes() on it if you need to keep the data for later.
+    """
+    if raw_data:
+        return memoryview(value).cast('B')
+    return bytes(value)
+
+
 def check_for_permissions(activity):
     """Check for and request neccessary BLE permissions.
 
@@ -88,6 +323,11 @@ def check_for_permissions(activity):
     ACCESS_FINE_LOCATION does contain ACCESS_COARSE_LOCATION and
     ACCESS_BACKGROUND_LOCATION (?).
     """
+    # Imported here, so that the package (e.g. bleekWare.Publisher)
+    # can be imported outside of Android, too
+    from java import jclass
+    from android.os import Build
+
     api_level = Build.VERSION.SDK_INT
     if api_level >= 23 and api_level <= 30:
         permissions = [
@@ -0,0 +1,205 @@
+"""Tests for the L2CAP channel transport of bleekWare.Client.
+
+The transport only needs an object with the methods of Android's
+BluetoothSocket, so a local socket pair stands in for the channel.
+Outside of Android, the java and android modules are replaced by
+stand-ins for the import of bleekWare.Client.
+"""
+
+import asyncio
+import importlib.util
+import socket
+import sys
+import threading
+import types
+import unittest.mock
+
+import pytest
+
+
+def _install_android_stand_ins():
+    """Provide the java and android modules outside of Android."""
+
+    class _Module(types.ModuleType):
+        def __getattr__(self, name):
+            if name.startswith('__'):
+                raise AttributeError(name)
+            value = unittest.mock.MagicMock(name=f'{self.__name__}.{name}')
+            setattr(self, name, value)
+            return value
+
+    for name in (
+        'java',
+        'java.util',
+        'android',
+        'android.bluetooth',
+        'android.bluetooth.le',
+        'android.content',
+        'android.os',
+    ):
+        sys.modules[name] = _Module(name)
+    java = sys.modules['java']
+    java.static_proxy = lambda *bases: object
+    java.Override = lambda *args: (lambda method: method)
+    java.jarray = lambda item_type: bytearray  # Writable like a Java array
+
+
+if importlib.util.find_spec('java') is None:
+    _install_android_stand_ins()
+
+from bleekWare.Client import _open_l2cap_stream  # noqa: E402
+
+BUFFER_SIZE = 1024
+
+
+class _InputStream:
+    def __init__(self, sock):
+        self.sock = sock
+
+    def read(self, buffer):
+        count = self.sock.recv_into(buffer)
+        return count if count else -1  # -1 at end of stream, like Java
+
+
+class _OutputStream:
+    def __init__(self, sock):
+        self.sock = sock
+
+    def write(self, buffer):
+        self.sock.sendall(buffer)
+
+    def flush(self):
+        pass
+
+
+class LocalSocket:
+    """A socket with the methods of Android's BluetoothSocket."""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def getInputStream(self):
+        return _InputStream(self.sock)
+
+    def getOutputStream(self):
+        return _OutputStream(self.sock)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def _receive_all(sock):
+    """Read from 'sock' until the end of stream (blocking)."""
+    chunks = []
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            return b''.join(chunks)
+        chunks.append(data)
+
+
+async def _open():
+    local, peer = socket.socketpair()
+    reader, writer = await _open_l2cap_stream(LocalSocket(local), BUFFER_SIZE)
+    return reader, writer, peer
+
+
+def test_backpressure():
+    async def run():
+        reader, writer, peer = await _open()
+        payload = bytes(range(256)) * 4096  # 1 MiB
+
+        async def send():
+            for start in range(0, len(payload), 4096):
+                writer.write(payload[start : start + 4096])
+                await writer.drain()
+            writer.close()
+
+        sender = asyncio.ensure_future(send())
+        await asyncio.sleep(0.2)
+        # The peer doesn't read yet, so drain() must hold the sender
+        # back once the write buffer exceeds its high water mark
+        assert not sender.done()
+        buffered = writer.transport.get_write_buffer_size()
+        assert buffered <= 4 * BUFFER_SIZE + 4096
+
+        loop = asyncio.get_running_loop()
+        received = await loop.run_in_executor(None, _receive_all, peer)
+        await sender
+        assert received == payload
+        peer.close()
+
+    asyncio.run(run())
+
+
+def test_receive_and_eof():
+    async def run():
+        reader, writer, peer = await _open()
+        peer.sendall(b'hello ')
+        peer.sendall(b'world')
+        peer.shutdown(socket.SHUT_WR)
+        assert await reader.read() == b'hello world'
+        assert reader.at_eof()
+        writer.close()
+        await writer.wait_closed()
+        peer.close()
+
+    asyncio.run(run())
+
+
+def test_close_writes_queued_data():
+    async def run():
+        reader, writer, peer = await _open()
+        payload = b'x' * (10 * BUFFER_SIZE)
+        for start in range(0, len(payload), 100):
+            writer.write(payload[start : start + 100])
+        writer.close()  # Without drain(), all data is still queued
+
+        loop = asyncio.get_running_loop()
+        received = await loop.run_in_executor(None, _receive_all, peer)
+        assert received == payload
+        await writer.wait_closed()
+        peer.close()
+
+    asyncio.run(run())
+
+
+def test_write_after_close_raises():
+    async def run():
+        reader, writer, peer = await _open()
+        writer.close()
+        await writer.wait_closed()
+        with pytest.raises(ConnectionError):
+            writer.write(b'lost')
+        peer.close()
+
+    asyncio.run(run())
+
+
+def test_write_after_peer_closed_raises():
+    async def run():
+        reader, writer, peer = await _open()
+        peer.close()
+        assert await reader.read() == b''
+        await asyncio.sleep(0.1)  # Let the transport see the lost channel
+        with pytest.raises(ConnectionError):
+            writer.write(b'lost')
+
+    asyncio.run(run())
+
+
+def test_threads_end_after_close():
+    async def run():
+        before = threading.active_count()
+        reader, writer, peer = await _open()
+        writer.close()
+        await writer.wait_closed()
+        peer.close()
+        await asyncio.sleep(0.1)
+        assert threading.active_count() <= before
+
+    asyncio.run(run())
@@ -0,0 +1,195 @@
+"""Tests for bleekWare.Publisher.
+
+The module must work without Android, so these tests run on any
+platform with Unix domain sockets and don't replace any Android modules.
+"""
+
+import asyncio
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from bleekWare import AdvertisementData, BLEDevice
+from bleekWare.Publisher import (
+    Advertisement,
+    MAX_FRAME_SIZE,
+    NOTIFICATIONS,
+    Notification,
+    Publisher,
+    Subscriber,
+    encode_notification,
+)
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(asyncio, 'start_unix_server'),
+    reason='Unix domain sockets are not available',
+)
+
+HEART_RATE = '0000180d-0000-1000-8000-00805f9b34fb'
+HEART_RATE_MEASUREMENT = '00002a37-0000-1000-8000-00805f9b34fb'
+
+
+def _socket_path(directory):
+    # Keep the path short, Unix socket paths are limited to ~100 bytes
+    return os.path.join(directory, 'ble.sock')
+
+
+async def _next(subscriber):
+    return await asyncio.wait_for(subscriber.__anext__(), 1)
+
+
+async def _drain(subscriber):
+    """Return all messages received until the stream is quiet."""
+    messages = []
+    while True:
+        try:
+            message = await asyncio.wait_for(subscriber.__anext__(), 0.2)
+        except asyncio.TimeoutError:
+            return messages
+        messages.append(message)
+
+
+def test_import_without_android():
+    code = (
+        'import sys, bleekWare.Publisher; '
+        'assert not [m for m in sys.modules '
+        "if m.split('.')[0] in ('java', 'android')]"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_round_trip_and_filters():
+    async def run(directory):
+        path = _socket_path(directory)
+        async with Publisher(path) as publisher:
+            everything = Subscriber(path)
+            notifications = Subscriber(
+                path, advertisements=False, characteristics=['2a37']
+            )
+            heart_rate = Subscriber(
+                path,
+                notifications=False,
+                addresses=['aa:bb:cc:dd:ee:ff'],
+                service_uuids=['180d'],
+            )
+            for subscriber in (everything, notifications, heart_rate):
+                await subscriber.connect()
+            await asyncio.sleep(0.1)  # Let the publisher read the filters
+
+            advertisement = AdvertisementData(
+                local_name='HRM',
+                manufacturer_data={0x004C: memoryview(b'\x02\x15')},
+                service_data={HEART_RATE: b'\x01'},
+                service_uuids=[HEART_RATE],
+                tx_power=-4,
+                rssi=-60,
+            )
+            publisher.publish_advertisement(
+                BLEDevice('AA:BB:CC:DD:EE:FF', 'HRM', object()), advertisement
+            )
+            publisher.publish_advertisement(
+                BLEDevice('11:22:33:44:55:66', None, None),
+                AdvertisementData(service_uuids=None),
+            )
+            publisher.publish_notification(
+                'AA:BB:CC:DD:EE:FF', '2a37', b'\x00\x48'
+            )
+            publisher.publish_notification(
+                'AA:BB:CC:DD:EE:FF', '2a38', b'\x01'
+            )
+
+            received = await _drain(everything)
+            assert len(received) == 4
+            device, data = received[0]
+            assert isinstance(received[0], Advertisement)
+            assert device.address == 'AA:BB:CC:DD:EE:FF'
+            assert device.name == 'HRM'
+            assert device.details is None
+            assert data.local_name == 'HRM'
+            assert data.manufacturer_data == {0x004C: b'\x02\x15'}
+            assert data.service_data == {HEART_RATE: b'\x01'}
+            assert data.service_uuids == [HEART_RATE]
+            assert (data.tx_power, data.rssi) == (-4, -60)
+            assert received[1].advertisement_data.service_uuids is None
+            assert received[1].advertisement_data.tx_power is None
+            assert received[2] == Notification(
+                'AA:BB:CC:DD:EE:FF', HEART_RATE_MEASUREMENT, b'\x00\x48'
+            )
+
+            assert await _drain(notifications) == [received[2]]
+            filtered = await _drain(heart_rate)
+            assert len(filtered) == 1
+            assert filtered[0].device.address == 'AA:BB:CC:DD:EE:FF'
+
+            for subscriber in (everything, notifications, heart_rate):
+                await subscriber.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+def test_buffer_overflow_drops_oldest():
+    async def run(directory):
+        path = _socket_path(directory)
+        async with Publisher(path, max_buffer=4) as publisher:
+            async with Subscriber(path) as subscriber:
+                await asyncio.sleep(0.1)
+                # Publish more than the buffer holds before the
+                # publisher's event loop gets to send anything
+                for count in range(10):
+                    publisher._publish(
+                        NOTIFICATIONS,
+                        'A',
+                        {HEART_RATE_MEASUREMENT},
+                        encode_notification(
+                            'A', HEART_RATE_MEASUREMENT, bytes([count])
+                        ),
+                    )
+                received = await _drain(subscriber)
+                assert [message.data for message in received] == [
+                    bytes([count]) for count in range(6, 10)
+                ]
+                (subscription,) = publisher.subscriptions
+                assert subscription.dropped == 6
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+@pytest.mark.parametrize('length', [0, MAX_FRAME_SIZE + 1])
+def test_invalid_frame_length(length):
+    async def run(directory):
+        path = _socket_path(directory)
+
+        async def serve(reader, writer):
+            writer.write(struct.pack('>IB', length, 0x02))
+            await writer.drain()
+
+        server = await asyncio.start_unix_server(serve, path=path)
+        async with Subscriber(path) as subscriber:
+            with pytest.raises(ConnectionError):
+                await _next(subscriber)
+        server.close()
+        await server.wait_closed()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+def test_publisher_drops_subscriber_with_invalid_frame():
+    async def run(directory):
+        path = _socket_path(directory)
+        async with Publisher(path) as publisher:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(struct.pack('>IB', 0, 0x10))
+            await writer.drain()
+            assert await asyncio.wait_for(reader.read(), 1) == b''
+            assert not publisher.subscriptions
+            writer.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))